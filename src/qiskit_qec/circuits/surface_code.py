@@ -16,9 +16,17 @@
 
 """Generates circuits based on repetition codes."""
 
+import copy
+import functools
+
+import numpy as np
+
 from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+from qiskit.circuit import CircuitInstruction
+from qiskit.circuit.library import XGate, ZGate
 
-from qiskit_qec.utils import DecodingGraphNode
+from qiskit_qec.exceptions import QiskitQECError
+from qiskit_qec.utils import DecodingGraphNode, NodesSoA
 from qiskit_qec.circuits.code_circuit import CodeCircuit
 
 
@@ -26,7 +34,7 @@ class SurfaceCodeCircuit(CodeCircuit):
 
     """Distance d rotated surface code with  T syndrome measurement rounds."""
 
-    def __init__(self, d: int, T: int, basis: str = "z", resets=True):
+    def __init__(self, d: int, T: int, basis: str = "z", resets=True, schedule: str = "NZ"):
         """Creates the circuits corresponding to logical basis states.
 
         Creates the circuits corresponding to logical basis states encoded
@@ -37,6 +45,15 @@ class SurfaceCodeCircuit(CodeCircuit):
             T (int): Number of rounds of ancilla-assisted syndrome measurement.
             basis (str): Basis used to initialize qubit.
             resets (bool): Whether to include a reset gate after mid-circuit measurements.
+            schedule (str): Order of entangling gates in each syndrome measurement round.
+                For `'NZ'`, Z plaquettes use an N-shaped order and X plaquettes a
+                Z-shaped order, so that hook errors are perpendicular to the
+                corresponding logicals. For `'diagonal'`, all plaquettes use the same
+                Z-shaped order, such that each time step couples every ancilla to the
+                code qubit in the same direction. Hook errors for Z plaquettes are then
+                parallel to the Z logical, which reduces the circuit-level distance for
+                `basis='x'` to `(d+1)/2`. No such uniform order preserves the distance
+                for both bases.
 
 
         Additional information:
@@ -52,10 +69,27 @@ class SurfaceCodeCircuit(CodeCircuit):
         self.T = 0
         self.basis = basis
         self._resets = resets
+        if schedule not in ["NZ", "diagonal"]:
+            raise QiskitQECError("schedule must be 'NZ' or 'diagonal', not " + str(schedule))
+        self.schedule = schedule
 
         # get layout of plaquettes
         self.zplaqs, self.xplaqs, self._zplaq_coords, self._xplaq_coords = self._get_plaquettes()
 
+        # schedule of entangling gates
+        self._zcx, self._xcx = self._get_cx_schedule()
+
+        # qubits of each plaquette in CSR form
+        self._stabilizers_np = {}
+        for pauli, plaqs in [("z", self.zplaqs), ("x", self.xplaqs)]:
+            plaq_idx = np.array(
+                [[0 if q is None else q for q in plaq] for plaq in plaqs], dtype=np.int32
+            )
+            plaq_mask = np.array([[q is not None for q in plaq] for plaq in plaqs], dtype=bool)
+            indptr = np.zeros(len(plaqs) + 1, dtype=np.int32)
+            np.cumsum(plaq_mask.sum(axis=1), out=indptr[1:])
+            self._stabilizers_np[pauli] = (indptr, plaq_idx[plaq_mask])
+
         self._logicals = {"x": [], "z": []}
         # X logicals for left and right sides
         self._logicals["x"].append([j * self.d for j in range(self.d)])
@@ -63,6 +97,10 @@ class SurfaceCodeCircuit(CodeCircuit):
         # Z logicals for top and bottom rows
         self._logicals["z"].append(list(range(self.d)))
         self._logicals["z"].append([self.d**2 - 1 - j for j in range(self.d)])
+        self._logicals_np = {
+            "x": np.array(self._logicals["x"], dtype=np.int32),
+            "z": np.array(self._logicals["z"], dtype=np.int32),
+        }
 
         # set gauge and stabilizer info
         self.x_gauge_ops = [[q for q in plaq if q is not None] for plaq in self.xplaqs]
@@ -74,6 +112,21 @@ class SurfaceCodeCircuit(CodeCircuit):
         self.z_logical = [self._logicals["z"][0]]
         self.z_boundary = [self._logicals["z"][0] + self._logicals["z"][1]]
 
+        # qubits for the stabilizers and then the logicals of the basis, in CSR form
+        indptr, indices = self._stabilizers_np[basis]
+        self._node_qubits_offsets = np.concatenate(
+            [indptr, indptr[-1] + d * np.arange(1, 3, dtype=np.int32)]
+        )
+        self._node_qubits_flat = np.concatenate([indices, self._logicals_np[basis].ravel()])
+
+        # the same as a matrix, whose product with the final readout of code qubits
+        # gives the final syndrome followed by the two logicals (modulo 2)
+        self._readout_checks = np.zeros((d**2, len(indptr) + 1), dtype=np.float32)
+        self._readout_checks[
+            self._node_qubits_flat,
+            np.repeat(np.arange(len(indptr) + 1), np.diff(self._node_qubits_offsets)),
+        ] = 1
+
         # quantum registers
         self._num_xy = int((d**2 - 1) / 2)
         self.code_qubit = QuantumRegister(d**2, "code_qubit")
@@ -81,21 +134,32 @@ class SurfaceCodeCircuit(CodeCircuit):
         self.xplaq_qubit = QuantumRegister(self._num_xy, "xplaq_qubit")
         self.qubit_registers = [self.code_qubit, self.zplaq_qubit, self.xplaq_qubit]
 
-        # classical registers
-        self.xplaq_bits = []
-        self.zplaq_bits = []
+        # classical registers, with those for all T syndrome measurement rounds
+        self.zplaq_bits = [
+            ClassicalRegister(self._num_xy, "round_" + str(t) + "_zplaq_bit") for t in range(T)
+        ]
+        self.xplaq_bits = [
+            ClassicalRegister(self._num_xy, "round_" + str(t) + "_xplaq_bit") for t in range(T)
+        ]
         self.code_bit = ClassicalRegister(d**2, "code_bit")
 
-        # create the circuits
+        # circuits for a single syndrome measurement round, see `_get_round_circuit`
+        self._round_circuits = {}
+
+        # create the circuit for logical 0, from which that for logical 1 is copied
         self.circuit = {}
-        for log in ["0", "1"]:
-            self.circuit[log] = QuantumCircuit(
-                self.code_qubit, self.zplaq_qubit, self.xplaq_qubit, name=log
-            )
+        self.circuit["0"] = QuantumCircuit(
+            self.code_qubit, self.zplaq_qubit, self.xplaq_qubit, name="0"
+        )
         self.base = "0"
+        self.circuit["0"].add_register(
+            *(creg for creg_pair in zip(self.zplaq_bits, self.xplaq_bits) for creg in creg_pair)
+        )
 
-        # apply initial logical paulis for encoded states
-        self._preparation()
+        # apply initial gates common to both logical values
+        if self.basis == "x":
+            self.circuit["0"].h(self.code_qubit)
+        num_prep = len(self.circuit["0"].data)
 
         # add the gates required for syndrome measurements
         for _ in range(T - 1):
@@ -104,6 +168,46 @@ class SurfaceCodeCircuit(CodeCircuit):
             self.syndrome_measurement(final=True)
             self.readout()
 
+        # apply initial logical paulis for encoded states
+        self._preparation(num_prep)
+
+    @classmethod
+    def get(cls, d: int, T: int, basis: str = "z", resets=True, schedule: str = "NZ"):
+        """Returns a code circuit object, reusing circuits built by previous calls.
+
+        Args:
+            d (int): Number of code qubits (and hence repetitions) used.
+            T (int): Number of rounds of ancilla-assisted syndrome measurement.
+            basis (str): Basis used to initialize qubit.
+            resets (bool): Whether to include a reset gate after mid-circuit measurements.
+            schedule (str): Order of entangling gates in each syndrome measurement round.
+
+        Returns:
+            SurfaceCodeCircuit: Equivalent to `SurfaceCodeCircuit(d, T, basis, resets, schedule)`.
+
+        Additional information:
+            Objects for the most recently used arguments are cached. Each call
+            returns a copy, which can be modified without affecting the cache.
+            Only the registers and the circuits for single syndrome measurement
+            rounds, which are not modified by any method, are shared.
+        """
+        cached = cls._get_cached(d, T, basis, resets, schedule)
+
+        # everything is deep copied except for the registers and circuits, since
+        # a deep copy of these is slower than building the object
+        memo = {id(qc): qc.copy() for qc in cached.circuit.values()}
+        for qc in cached._round_circuits.values():
+            memo[id(qc)] = qc
+        registers = cached.qubit_registers + cached.zplaq_bits + cached.xplaq_bits
+        for register in registers + [cached.code_bit]:
+            memo[id(register)] = register
+        return copy.deepcopy(cached, memo)
+
+    @classmethod
+    @functools.lru_cache(maxsize=64)
+    def _get_cached(cls, d, T, basis, resets, schedule):
+        return cls(d, T, basis=basis, resets=resets, schedule=schedule)
+
     def _get_plaquettes(self):
         """
         Returns `zplaqs` and `xplaqs`, which are lists of the Z and X type
@@ -113,45 +217,73 @@ class SurfaceCodeCircuit(CodeCircuit):
 
         d = self.d
 
-        zplaqs = []
-        xplaqs = []
-        zplaq_coords = []
-        xplaq_coords = []
-        for y in range(-1, d):
-            for x in range(-1, d):
-                bulk = x in range(d - 1) and y in range(d - 1)
-                ztab = (x == -1 and y % 2 == 0) or (x == d - 1 and y % 2 == 1)
-                xtab = (y == -1 and x % 2 == 1) or (y == d - 1 and x % 2 == 0)
-
-                if (x in range(d - 1) or y in range(d - 1)) and (bulk or ztab or xtab):
-                    plaq = []
-                    for dy in range(2):
-                        for dx in range(2):
-                            if x + dx in range(d) and y + dy in range(d):
-                                plaq.append(x + dx + d * (y + dy))
-                            else:
-                                plaq.append(None)
-
-                    if (x + y) % 2 == 0:
-                        xplaqs.append([plaq[0], plaq[1], plaq[2], plaq[3]])
-                        xplaq_coords.append((x, y))
-                    else:
-                        zplaqs.append([plaq[0], plaq[2], plaq[1], plaq[3]])
-                        zplaq_coords.append((x, y))
+        # all candidate plaquette positions, with y as the slow index
+        ys, xs = np.meshgrid(np.arange(-1, d), np.arange(-1, d), indexing="ij")
+
+        bulk = (xs >= 0) & (xs < d - 1) & (ys >= 0) & (ys < d - 1)
+        ztab = ((xs == -1) & (ys % 2 == 0)) | ((xs == d - 1) & (ys % 2 == 1))
+        xtab = ((ys == -1) & (xs % 2 == 1)) | ((ys == d - 1) & (xs % 2 == 0))
+        inner = ((xs >= 0) & (xs < d - 1)) | ((ys >= 0) & (ys < d - 1))
+        keep = inner & (bulk | ztab | xtab)
+
+        # qubit at each corner, with -1 for corners outside the lattice
+        corners = []
+        for dy in range(2):
+            for dx in range(2):
+                in_range = (xs + dx >= 0) & (xs + dx < d) & (ys + dy >= 0) & (ys + dy < d)
+                corners.append(np.where(in_range, (xs + dx) + d * (ys + dy), -1))
+        corners = np.stack(corners, axis=-1)
+
+        is_x = (xs + ys) % 2 == 0
+        xmask = keep & is_x
+        zmask = keep & ~is_x
+
+        xplaqs = [[None if q < 0 else q for q in plaq] for plaq in corners[xmask].tolist()]
+        zplaqs = [
+            [None if q < 0 else q for q in plaq]
+            for plaq in corners[zmask][:, [0, 2, 1, 3]].tolist()
+        ]
+        xplaq_coords = list(zip(xs[xmask].tolist(), ys[xmask].tolist()))
+        zplaq_coords = list(zip(xs[zmask].tolist(), ys[zmask].tolist()))
 
         return zplaqs, xplaqs, zplaq_coords, xplaq_coords
 
-    def _preparation(self):
+    def _get_cx_schedule(self):
+        """
+        Returns `zcx` and `xcx`, which give the entangling gates for the Z
+        and X type plaquettes. For each time step, these contain a list
+        of `(code_qubit, plaquette)` pairs for the gates applied in that
+        step.
+        """
+        if self.schedule == "diagonal":
+            # same corner order as for the xplaqs (at the cost of distance for basis x)
+            zorder = [0, 2, 1, 3]
+        else:
+            zorder = [0, 1, 2, 3]
+        zcx = [
+            [(plaq[j], p) for p, plaq in enumerate(self.zplaqs) if plaq[j] is not None]
+            for j in zorder
+        ]
+        xcx = [
+            [(plaq[j], p) for p, plaq in enumerate(self.xplaqs) if plaq[j] is not None]
+            for j in range(4)
+        ]
+        return zcx, xcx
+
+    def _preparation(self, index):
         """
-        Prepares logical bit states by applying an x to the circuit that will
-        encode a 1.
+        Prepares logical bit states by creating the circuit that will encode
+        a 1 as a copy of that for 0, with a logical x (or z for basis x)
+        inserted after the first `index` instructions.
         """
+        qc = self.circuit["0"].copy(name="1")
         if self.basis == "z":
-            self.x(["1"])
+            gate, qubits = XGate(), self.code_qubit[:: self.d]
         else:
-            for qc in self.circuit.values():
-                qc.h(self.code_qubit)
-            self.z(["1"])
+            gate, qubits = ZGate(), self.code_qubit[: self.d]
+        for j, qubit in enumerate(qubits):
+            qc.data.insert(index + j, CircuitInstruction(gate, (qubit,)))
+        self.circuit["1"] = qc
 
     def get_circuit_list(self):
         """
@@ -173,8 +305,7 @@ class SurfaceCodeCircuit(CodeCircuit):
                 the end.
         """
         for log in logs:
-            for j in range(self.d):
-                self.circuit[log].x(self.code_qubit[j * self.d])
+            self.circuit[log].x(self.code_qubit[:: self.d])
             if barrier:
                 self.circuit[log].barrier()
 
@@ -188,11 +319,50 @@ class SurfaceCodeCircuit(CodeCircuit):
                 the end.
         """
         for log in logs:
-            for j in range(self.d):
-                self.circuit[log].z(self.code_qubit[j])
+            self.circuit[log].z(self.code_qubit[: self.d])
             if barrier:
                 self.circuit[log].barrier()
 
+    def _get_round_circuit(self, final=False, barrier=False):
+        """
+        Returns a circuit for a single syndrome measurement round, with
+        the same quantum registers as `self.circuit` and a Z and X plaquette
+        classical register. These are built once for each value of the
+        arguments and then reused for all rounds.
+        """
+        if (final, barrier) in self._round_circuits:
+            return self._round_circuits[final, barrier]
+
+        zplaq_bit = ClassicalRegister(self._num_xy, "zplaq_bit")
+        xplaq_bit = ClassicalRegister(self._num_xy, "xplaq_bit")
+        qc = QuantumCircuit(
+            self.code_qubit, self.zplaq_qubit, self.xplaq_qubit, zplaq_bit, xplaq_bit
+        )
+
+        qc.h(self.xplaq_qubit)
+
+        # gates for each time step are added with a single call for each type
+        for zcx, xcx in zip(self._zcx, self._xcx):
+            if zcx:
+                qc.cx([self.code_qubit[c] for c, _ in zcx], [self.zplaq_qubit[p] for _, p in zcx])
+            if xcx:
+                qc.cx([self.xplaq_qubit[p] for _, p in xcx], [self.code_qubit[c] for c, _ in xcx])
+
+        qc.h(self.xplaq_qubit)
+
+        for j in range(self._num_xy):
+            qc.measure(self.xplaq_qubit[j], xplaq_bit[j])
+            qc.measure(self.zplaq_qubit[j], zplaq_bit[j])
+            if self._resets and not final:
+                qc.reset(self.xplaq_qubit[j])
+                qc.reset(self.zplaq_qubit[j])
+
+        if barrier:
+            qc.barrier()
+
+        self._round_circuits[final, barrier] = qc
+        return qc
+
     def syndrome_measurement(self, final=False, barrier=False):
         """Application of a syndrome measurement round.
 
@@ -203,43 +373,22 @@ class SurfaceCodeCircuit(CodeCircuit):
 
         """
 
-        zplaqs, xplaqs = self.zplaqs, self.xplaqs
-
-        # classical registers for this round
-        self.zplaq_bits.append(
-            ClassicalRegister(self._num_xy, "round_" + str(self.T) + "_zplaq_bit")
-        )
-        self.xplaq_bits.append(
-            ClassicalRegister(self._num_xy, "round_" + str(self.T) + "_xplaq_bit")
-        )
-
-        for log in ["0", "1"]:
-            self.circuit[log].add_register(self.zplaq_bits[-1])
-            self.circuit[log].add_register(self.xplaq_bits[-1])
-
-            self.circuit[log].h(self.xplaq_qubit)
-
-            for j in range(4):
-                for p, plaq in enumerate(zplaqs):
-                    c = plaq[j]
-                    if c is not None:
-                        self.circuit[log].cx(self.code_qubit[c], self.zplaq_qubit[p])
-                for p, plaq in enumerate(xplaqs):
-                    c = plaq[j]
-                    if c is not None:
-                        self.circuit[log].cx(self.xplaq_qubit[p], self.code_qubit[c])
-
-            self.circuit[log].h(self.xplaq_qubit)
-
-            for j in range(self._num_xy):
-                self.circuit[log].measure(self.xplaq_qubit[j], self.xplaq_bits[self.T][j])
-                self.circuit[log].measure(self.zplaq_qubit[j], self.zplaq_bits[self.T][j])
-                if self._resets and not final:
-                    self.circuit[log].reset(self.xplaq_qubit[j])
-                    self.circuit[log].reset(self.zplaq_qubit[j])
+        # classical registers for this round, unless already added in `__init__`
+        if len(self.zplaq_bits) <= self.T:
+            self.zplaq_bits.append(
+                ClassicalRegister(self._num_xy, "round_" + str(self.T) + "_zplaq_bit")
+            )
+            self.xplaq_bits.append(
+                ClassicalRegister(self._num_xy, "round_" + str(self.T) + "_xplaq_bit")
+            )
+            for circuit in self.circuit.values():
+                circuit.add_register(self.zplaq_bits[-1], self.xplaq_bits[-1])
 
-            if barrier:
-                self.circuit[log].barrier()
+        # the gates for the round are shared by the circuits for both logicals
+        qc = self._get_round_circuit(final, barrier)
+        clbits = self.zplaq_bits[self.T][:] + self.xplaq_bits[self.T][:]
+        for circuit in self.circuit.values():
+            circuit.compose(qc, clbits=clbits, inplace=True)
 
         self.T += 1
 
@@ -249,70 +398,29 @@ class SurfaceCodeCircuit(CodeCircuit):
         as well as allowing for a measurement of the syndrome to be inferred.
         """
 
-        for log in ["0", "1"]:
+        for circuit in self.circuit.values():
             if self.basis == "x":
-                self.circuit[log].h(self.code_qubit)
-            self.circuit[log].add_register(self.code_bit)
-            self.circuit[log].measure(self.code_qubit, self.code_bit)
-
-    def _string2changes(self, string):
-        basis = self.basis
+                circuit.h(self.code_qubit)
+            circuit.add_register(self.code_bit)
+            circuit.measure(self.code_qubit, self.code_bit)
 
-        # final syndrome for plaquettes deduced from final code qubit readout
-        final_readout = string.split(" ")[0][::-1]
-        if basis == "z":
-            plaqs = self.zplaqs
-        else:
-            plaqs = self.xplaqs
-        full_syndrome = ""
-        for plaq in plaqs:
-            parity = 0
-            for q in plaq:
-                if q is not None:
-                    parity += int(final_readout[q])
-            full_syndrome = str(parity % 2) + full_syndrome
-
-        # results from all other plaquette syndrome measurements then added
-        if basis == "z":
-            full_syndrome = full_syndrome + " " + " ".join(string.split(" ")[2::2])
+    def _syndrome_changes(self, syndromes):
+        """
+        Calculates syndrome changes from an array of syndromes, of shape
+        `(..., rounds, plaquettes)` with `syndromes[..., t, :]` the syndrome
+        of round `t`.
+        """
+        height = syndromes.shape[-2]
+        changes = syndromes.copy()
+        if self._resets:
+            changes[..., 1:, :] ^= syndromes[..., :-1, :]
         else:
-            full_syndrome = full_syndrome + " " + " ".join(string.split(" ")[1::2])
-
-        # changes between one syndrome and the next then calculated
-        syndrome_list = full_syndrome.split(" ")
-        height = len(syndrome_list)
-        width = len(syndrome_list[0])
-        syndrome_changes = ""
-        for t in range(height):
-            for j in range(width):
-                if self._resets:
-                    if t == 0:
-                        change = syndrome_list[-1][j] != "0"
-                    else:
-                        change = syndrome_list[-t][j] != syndrome_list[-t - 1][j]
-                    syndrome_changes += "0" * (not change) + "1" * change
-                else:
-                    if t <= 1:
-                        if t != self.T:
-                            change = syndrome_list[-t - 1][j] != "0"
-                        else:
-                            change = syndrome_list[-t - 1][j] != syndrome_list[-t][j]
-                    elif t == self.T:
-                        last3 = ""
-                        for dt in range(3):
-                            last3 += syndrome_list[-t - 1 + dt][j]
-                        change = last3.count("1") % 2 == 1
-                    else:
-                        change = syndrome_list[-t - 1][j] != syndrome_list[-t + 1][j]
-                    syndrome_changes += "0" * (not change) + "1" * change
-            syndrome_changes += " "
-        syndrome_changes = syndrome_changes[0:-1]
-
-        if basis != self.basis:
-            # trim the noisy nonsense (first and last rounds)
-            syndrome_changes = " ".join(syndrome_changes.split(" ")[1:-1])
-
-        return syndrome_changes
+            # without resets, each measurement is compared to the one two rounds before
+            changes[..., 2:, :] ^= syndromes[..., :-2, :]
+            # except for the final syndrome, which is deduced from the code qubits
+            if 1 <= self.T < height:
+                changes[..., self.T, :] ^= syndromes[..., self.T - 1, :]
+        return changes
 
     def string2raw_logicals(self, string):
         """
@@ -322,41 +430,23 @@ class SurfaceCodeCircuit(CodeCircuit):
         Returns:
             list: Raw values for logical operators that correspond to nodes.
         """
-        final_readout = string.split(" ")[0][::-1]
-        # get logical readout
+        # parities are taken directly from the characters of the final readout,
+        # since a single string has too few bits for array operations to pay off
         # (though it's called Z, it actually depends on the basis)
-        Z = [0, 0]
-        for j in range(self.d):
-            if self.basis == "z":
-                # evaluated using top row
-                Z[0] = (Z[0] + int(final_readout[j])) % 2
-                # evaluated using bottom row
-                Z[1] = (Z[1] + int(final_readout[self.d**2 - 1 - j])) % 2
-            else:
-                # evaluated using left side
-                Z[0] = (Z[0] + int(final_readout[j * self.d])) % 2
-                # evaluated using right side
-                Z[1] = (Z[1] + int(final_readout[(j + 1) * self.d - 1])) % 2
-        return [str(Z[0]), str(Z[1])]
-
-    def _process_string(self, string):
-        # get logical readout
-        measured_Z = self.string2raw_logicals(string)
-
-        # then get syndrome changes
-        syndrome_changes = self._string2changes(string)
+        final_readout = string.split(" ", 1)[0].encode("ascii")
+        return [
+            str(sum(final_readout[-1 - q] for q in logical) & 1)
+            for logical in self._logicals[self.basis]
+        ]
 
-        # the space separated string of syndrome changes then gets a
-        # double space separated logical value on the end
-        new_string = " ".join(measured_Z) + "  " + syndrome_changes
-
-        return new_string
-
-    def _separate_string(self, string):
-        separated_string = []
-        for syndrome_type_string in string.split("  "):
-            separated_string.append(syndrome_type_string.split(" "))
-        return separated_string
+    def _readout2checks(self, final_readout):
+        """
+        Returns the final syndrome followed by the two logicals, for final
+        readouts of shape `(..., code qubits)`.
+        """
+        # logicals evaluated using top and bottom rows for z basis, left and right sides for x
+        checks = final_readout.astype(np.float32) @ self._readout_checks
+        return checks.astype(np.uint8) & 1
 
     def string2nodes(self, string, **kwargs):
         """Convert output string from circuits into a set of nodes.
@@ -385,36 +475,184 @@ class SurfaceCodeCircuit(CodeCircuit):
         if logical is None:
             logical = "0"
 
-        string = self._process_string(string)
-        separated_string = self._separate_string(string)
-        nodes = []
+        if self.basis == "z":
+            stabilizer_ops = self.z_stabilizer_ops
+        else:
+            stabilizer_ops = self.x_stabilizer_ops
 
         # boundary nodes
-        boundary = separated_string[0]  # [<last_elem>, <init_elem>]
-        for bqec_index, belement in enumerate(boundary[::-1]):
-            if all_logicals or belement != logical:
+        nodes = []
+        measured_Z = self.string2raw_logicals(string)
+        for bqec_index in [1, 0]:
+            if all_logicals or measured_Z[bqec_index] != logical:
                 node = DecodingGraphNode(
                     is_logical=True,
                     is_boundary=True,
-                    qubits=self._logicals[self.basis][-bqec_index - 1],
-                    index=1 - bqec_index,
+                    qubits=self._logicals[self.basis][bqec_index],
+                    index=bqec_index,
                 )
                 nodes.append(node)
 
+        # syndromes are held as integers, with bit p for plaquette p
+        parts = string.split(" ")
+        if self.basis == "z":
+            syndromes = [int(syndrome, 2) for syndrome in parts[:1:-2]]
+        else:
+            syndromes = [int(syndrome, 2) for syndrome in parts[-2:0:-2]]
+
+        # final syndrome for plaquettes deduced from final code qubit readout
+        final_readout = parts[0].encode("ascii")
+        final_syndrome = 0
+        for qec_index, stabilizer in enumerate(stabilizer_ops):
+            final_syndrome |= (sum(final_readout[-1 - q] for q in stabilizer) & 1) << qec_index
+        syndromes.append(final_syndrome)
+
+        # changes between one syndrome and the next, as in `_syndrome_changes`
+        changes = list(syndromes)
+        if self._resets:
+            for syn_round in range(1, len(syndromes)):
+                changes[syn_round] ^= syndromes[syn_round - 1]
+        else:
+            for syn_round in range(2, len(syndromes)):
+                changes[syn_round] ^= syndromes[syn_round - 2]
+            if 1 <= self.T < len(syndromes):
+                changes[self.T] ^= syndromes[self.T - 1]
+
         # bulk nodes
-        for syn_type in range(1, len(separated_string)):
-            for syn_round in range(len(separated_string[syn_type])):
-                elements = separated_string[syn_type][syn_round]
-                for qec_index, element in enumerate(elements[::-1]):
-                    if element == "1":
-                        if self.basis == "x":
-                            qubits = self.x_stabilizer_ops[qec_index]
-                        else:
-                            qubits = self.z_stabilizer_ops[qec_index]
-                        node = DecodingGraphNode(time=syn_round, qubits=qubits, index=qec_index)
-                        nodes.append(node)
+        for syn_round, change in enumerate(changes):
+            while change:
+                qec_index = (change & -change).bit_length() - 1
+                node = DecodingGraphNode(
+                    time=syn_round, qubits=stabilizer_ops[qec_index], index=qec_index
+                )
+                nodes.append(node)
+                change &= change - 1
+
         return nodes
 
+    def strings2nodes(self, strings, **kwargs):
+        """Convert a batch of output strings from circuits into sets of nodes.
+
+        Gives the same nodes as calling `string2nodes` on each string, but
+        processes all strings together using array operations.
+
+        Args:
+            strings (list or np.ndarray): Results strings to convert, all of the
+                same length, given as a list or a NumPy array of strings.
+            kwargs (dict): Additional keyword arguments, as for `string2nodes`.
+
+        Returns:
+            list: For each string, the list of nodes corresponding to the
+                non-trivial elements in the string.
+        """
+
+        if len(strings) == 0:
+            return []
+
+        flagged_Z, changes = self._strings2arrays(strings, **kwargs)
+        if self.basis == "z":
+            stabilizer_ops = self.z_stabilizer_ops
+        else:
+            stabilizer_ops = self.x_stabilizer_ops
+
+        nodes = [[] for _ in strings]
+
+        # boundary nodes
+        for s, bqec_index in np.argwhere(flagged_Z).tolist():
+            node = DecodingGraphNode(
+                is_logical=True,
+                is_boundary=True,
+                qubits=self._logicals[self.basis][-bqec_index - 1],
+                index=1 - bqec_index,
+            )
+            nodes[s].append(node)
+
+        # bulk nodes
+        for s, syn_round, qec_index in np.argwhere(changes).tolist():
+            node = DecodingGraphNode(
+                time=syn_round, qubits=stabilizer_ops[qec_index], index=qec_index
+            )
+            nodes[s].append(node)
+
+        return nodes
+
+    def string2nodes_soa(self, string, **kwargs):
+        """Convert output string from circuits into a set of nodes, stored as arrays.
+
+        Args:
+            string (string): Results string to convert.
+            kwargs (dict): Additional keyword arguments, as for `string2nodes`.
+
+        Returns:
+            NodesSoA: Nodes corresponding to the non-trivial elements in the
+                string, in the same order as given by `string2nodes`.
+        """
+
+        flagged_Z, changes = self._strings2arrays([string], **kwargs)
+        bqec_indices = np.flatnonzero(flagged_Z[0])
+        syn_rounds, qec_indices = np.nonzero(changes[0])
+        num_boundary = len(bqec_indices)
+        num_bulk = len(qec_indices)
+
+        # rows of the node qubit table are the stabilizers followed by the logicals
+        rows = np.concatenate([self._num_xy + 1 - bqec_indices, qec_indices])
+        lengths = np.diff(self._node_qubits_offsets)[rows]
+        qubits_offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=qubits_offsets[1:])
+        starts = np.repeat(self._node_qubits_offsets[rows] - qubits_offsets[:-1], lengths)
+        qubits_flat = self._node_qubits_flat[starts + np.arange(qubits_offsets[-1])]
+
+        return NodesSoA(
+            times=np.concatenate([np.full(num_boundary, -1), syn_rounds]).astype(np.int32),
+            indices=np.concatenate([1 - bqec_indices, qec_indices]).astype(np.int32),
+            is_boundary=np.arange(num_boundary + num_bulk) < num_boundary,
+            is_logical=np.arange(num_boundary + num_bulk) < num_boundary,
+            qubits_offsets=qubits_offsets,
+            qubits_flat=qubits_flat,
+        )
+
+    def _strings2arrays(self, strings, **kwargs):
+        """
+        Processes a batch of output strings into arrays `flagged_Z`, which
+        specifies for each string whether the second and first logicals
+        give nodes, and `changes`, which gives the syndrome changes for each
+        string, round and plaquette.
+        """
+
+        all_logicals = kwargs.get("all_logicals")
+        logical = kwargs.get("logical")
+        if logical is None:
+            logical = "0"
+
+        num_strings = len(strings)
+        width = self._num_xy
+
+        bits = np.frombuffer("".join(strings).replace(" ", "").encode("ascii"), dtype=np.uint8)
+        bits = bits.reshape(num_strings, -1) & 1
+
+        # final readout, indexed by code qubit
+        final_readout = bits[:, self.n - 1 :: -1]
+        # syndrome measurements of the form [string, round, x/z, plaquette]
+        rounds = bits[:, self.n :].reshape(num_strings, -1, 2, width)[:, ::-1, :, ::-1]
+        if self.basis == "z":
+            syndromes = rounds[:, :, 1, :]
+        else:
+            syndromes = rounds[:, :, 0, :]
+
+        # final syndrome for plaquettes deduced from final code qubit readout
+        checks = self._readout2checks(final_readout)
+        syndromes = np.concatenate([syndromes, checks[:, np.newaxis, :width]], axis=1)
+        changes = self._syndrome_changes(syndromes)
+
+        # logical readout, with the second logical first as in `string2nodes`
+        measured_Z = checks[:, : width - 1 : -1]
+        if all_logicals:
+            flagged_Z = np.ones_like(measured_Z, dtype=bool)
+        else:
+            flagged_Z = measured_Z.astype(str) != logical
+
+        return flagged_Z, changes
+
     def check_nodes(self, nodes, ignore_extras=False, minimal=False):
         """
         Determines whether a given set of nodes are neutral. If so, also
@@ -31,9 +31,10 @@ Utils module classes and functions
     noisify_circuit
     DecodingGraphNode
     DecodingGraphEdge
+    NodesSoA
 """
 
 from . import indexer, pauli_rep, visualizations
 
 from .stim_tools import get_counts_via_stim, get_stim_circuits, noisify_circuit
-from .decoding_graph_attributes import DecodingGraphNode, DecodingGraphEdge
+from .decoding_graph_attributes import DecodingGraphNode, DecodingGraphEdge, NodesSoA
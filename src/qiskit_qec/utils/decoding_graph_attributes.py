@@ -20,6 +20,8 @@ Graph used as the basis of decoders.
 from dataclasses import dataclass, field
 from typing import Union, Any, Dict, List, Set, Optional
 
+import numpy as np
+
 from qiskit_qec.exceptions import QiskitQECError
 
 
@@ -175,6 +177,56 @@ class DecodingGraphEdge:
         return str(dict(self))
 
 
+@dataclass
+class NodesSoA:
+    """
+    Class to describe a set of DecodingGraph nodes as parallel arrays.
+
+    Attributes:
+     - times (np.ndarray): Syndrome round of each node, or -1 for
+        boundary and logical nodes.
+     - indices (np.ndarray): Index of each node in its measurement round.
+     - is_boundary (np.ndarray): Whether or not each node is a boundary node.
+     - is_logical (np.ndarray): Whether or not each node is a logical node.
+     - qubits_offsets (np.ndarray): The qubits of node `j` are given by
+        `qubits_flat[qubits_offsets[j]:qubits_offsets[j + 1]]`.
+     - qubits_flat (np.ndarray): Qubits of all nodes, concatenated.
+    """
+
+    times: np.ndarray
+    indices: np.ndarray
+    is_boundary: np.ndarray
+    is_logical: np.ndarray
+    qubits_offsets: np.ndarray
+    qubits_flat: np.ndarray
+
+    def __len__(self):
+        return len(self.indices)
+
+    def to_nodes(self) -> List[DecodingGraphNode]:
+        """Returns the nodes as a list of `DecodingGraphNode` objects."""
+        nodes = []
+        offsets = self.qubits_offsets.tolist()
+        qubits_flat = self.qubits_flat.tolist()
+        for j, (time, index, is_boundary, is_logical) in enumerate(
+            zip(
+                self.times.tolist(),
+                self.indices.tolist(),
+                self.is_boundary.tolist(),
+                self.is_logical.tolist(),
+            )
+        ):
+            node = DecodingGraphNode(
+                index=index,
+                qubits=qubits_flat[offsets[j] : offsets[j + 1]],
+                is_boundary=is_boundary,
+                is_logical=is_logical,
+                time=time,
+            )
+            nodes.append(node)
+        return nodes
+
+
 def _nodes2cpp(nodes):
     """
     Convert a list of nodes to the form required by C++ functions.
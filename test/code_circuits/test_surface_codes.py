@@ -16,10 +16,18 @@
 
 """Run codes and decoders."""
 
+import itertools
 import unittest
 
+import numpy as np
+
+from qiskit import execute
+from qiskit_aer import Aer
+
 from qiskit_qec.circuits.surface_code import SurfaceCodeCircuit
+from qiskit_qec.noise import PauliNoiseModel
 from qiskit_qec.utils import DecodingGraphNode
+from qiskit_qec.utils.stim_tools import get_stim_circuits, noisify_circuit
 
 
 class TestSurfaceCodes(unittest.TestCase):
@@ -146,6 +154,230 @@ class TestSurfaceCodes(unittest.TestCase):
                     + str(nodes),
                 )
 
+    def test_string2nodes_rounds(self):
+        """
+        Tests that string2nodes gives the correct syndrome changes for multiple rounds,
+        with and without resets.
+        """
+
+        plaq1 = [1, 4, 2, 5]
+        plaq2 = [3, 6, 4, 7]
+        readout_nodes = [
+            DecodingGraphNode(is_logical=True, is_boundary=True, qubits=[0, 1, 2], index=0),
+            DecodingGraphNode(time=3, qubits=[0, 3], index=0),
+        ]
+
+        test_nodes = {}
+        test_nodes[True] = {
+            # measurement error in round 0
+            "000000000 0000 0000 0000 0000 0000 0010": [
+                DecodingGraphNode(time=0, qubits=plaq1, index=1),
+                DecodingGraphNode(time=1, qubits=plaq1, index=1),
+            ],
+            # code qubit error before round 1
+            "000010000 0000 0110 0000 0110 0000 0000": [
+                DecodingGraphNode(time=1, qubits=plaq1, index=1),
+                DecodingGraphNode(time=1, qubits=plaq2, index=2),
+            ],
+            # code qubit error before final readout
+            "000000001 0000 0000 0000 0000 0000 0000": readout_nodes,
+        }
+        # without resets, each measurement result includes the previous one
+        test_nodes[False] = {
+            "000000000 0000 0000 0000 0000 0000 0010": [
+                DecodingGraphNode(time=0, qubits=plaq1, index=1),
+                DecodingGraphNode(time=2, qubits=plaq1, index=1),
+            ],
+            "000010000 0000 0000 0000 0110 0000 0000": [
+                DecodingGraphNode(time=1, qubits=plaq1, index=1),
+                DecodingGraphNode(time=1, qubits=plaq2, index=2),
+            ],
+            # code qubit error before the last round
+            "000010000 0000 0110 0000 0000 0000 0000": [
+                DecodingGraphNode(time=2, qubits=plaq1, index=1),
+                DecodingGraphNode(time=2, qubits=plaq2, index=2),
+            ],
+            "000000001 0000 0000 0000 0000 0000 0000": readout_nodes,
+        }
+
+        for resets, string_nodes in test_nodes.items():
+            code = SurfaceCodeCircuit(3, 3, basis="z", resets=resets)
+            for string, nodes in string_nodes.items():
+                self.assertEqual(
+                    code.string2nodes(string),
+                    nodes,
+                    "Wrong nodes for resets = " + str(resets) + " and string = " + string,
+                )
+            self.assertEqual(code.strings2nodes(list(string_nodes)), list(string_nodes.values()))
+
+    def test_strings2nodes(self):
+        """
+        Tests that batched conversion with strings2nodes agrees with string2nodes.
+        """
+
+        test_string = [
+            "000000000 0000 0000 0000 0000",
+            "000010000 0000 0110 0000 0110",
+            "000010000 0110 0000 0000 0000",
+            "000000001 0000 0000 1000 0000",
+            "100000000 0000 0001 0000 0000",
+        ]
+
+        for basis in ["x", "z"]:
+            for resets in [True, False]:
+                code = SurfaceCodeCircuit(3, 2, basis=basis, resets=resets)
+                for kwargs in [{}, {"all_logicals": True}, {"logical": "1"}]:
+                    generated_nodes = code.strings2nodes(test_string, **kwargs)
+                    nodes = [code.string2nodes(string, **kwargs) for string in test_string]
+                    self.assertEqual(
+                        generated_nodes,
+                        nodes,
+                        "Nodes from strings2nodes do not match string2nodes for basis = "
+                        + basis
+                        + " and resets = "
+                        + str(resets),
+                    )
+                    self.assertEqual(
+                        code.strings2nodes(np.array(test_string), **kwargs),
+                        nodes,
+                        "Nodes from strings2nodes differ for a NumPy array of strings.",
+                    )
+
+                self.assertEqual(code.strings2nodes(np.array([], dtype=str)), [])
+
+    def test_string2nodes_soa(self):
+        """
+        Tests that string2nodes_soa gives the expected arrays.
+        """
+
+        code = SurfaceCodeCircuit(3, 1, basis="z")
+
+        nodes = code.string2nodes_soa("000010000 0000 0110")
+        self.assertEqual(len(nodes), 2)
+        self.assertEqual(nodes.times.tolist(), [0, 0])
+        self.assertEqual(nodes.indices.tolist(), [1, 2])
+        self.assertEqual(nodes.is_boundary.tolist(), [False, False])
+        self.assertEqual(nodes.qubits_offsets.tolist(), [0, 4, 8])
+        self.assertEqual(nodes.qubits_flat.tolist(), [1, 4, 2, 5, 3, 6, 4, 7])
+
+        nodes = code.string2nodes_soa("100000000 0000 0000")
+        self.assertEqual(nodes.times.tolist(), [-1, 1])
+        self.assertEqual(nodes.indices.tolist(), [1, 3])
+        self.assertEqual(nodes.is_boundary.tolist(), [True, False])
+        self.assertEqual(nodes.is_logical.tolist(), [True, False])
+        self.assertEqual(nodes.qubits_offsets.tolist(), [0, 3, 5])
+        self.assertEqual(nodes.qubits_flat.tolist(), [8, 7, 6, 5, 8])
+        self.assertEqual(
+            nodes.to_nodes(),
+            [
+                DecodingGraphNode(is_logical=True, is_boundary=True, qubits=[8, 7, 6], index=1),
+                DecodingGraphNode(time=1, qubits=[5, 8], index=3),
+            ],
+        )
+
+    def test_schedules(self):
+        """
+        Tests that noiseless circuits give no nodes for all schedules.
+        """
+        backend = Aer.get_backend("aer_simulator_stabilizer")
+        for schedule in ["NZ", "diagonal"]:
+            for basis in ["x", "z"]:
+                code = SurfaceCodeCircuit(3, 2, basis=basis, schedule=schedule)
+                for log in ["0", "1"]:
+                    counts = execute(code.circuit[log], backend, shots=32).result().get_counts()
+                    for string in counts:
+                        nodes = code.string2nodes(string, logical=log)
+                        self.assertTrue(
+                            not nodes,
+                            "Noiseless circuit for schedule = "
+                            + schedule
+                            + " and basis = "
+                            + basis
+                            + " gives nodes "
+                            + str(nodes),
+                        )
+
+    def test_schedule_distances(self):
+        """
+        Tests the circuit-level distance for each schedule, with depolarizing noise on
+        all entangling gates.
+        """
+        noise_model = PauliNoiseModel()
+        paulis = ["".join(pauli) for pauli in itertools.product("ixyz", repeat=2)][1:]
+        noise_model.add_operation("cx", {pauli: 1 for pauli in paulis})
+        noise_model.set_error_probability("cx", 0.01)
+
+        # the diagonal schedule has hook errors parallel to the Z logical
+        expected_distances = {
+            "NZ": {"x": lambda d: d, "z": lambda d: d},
+            "diagonal": {"x": lambda d: (d + 1) // 2, "z": lambda d: d},
+        }
+        for schedule, distances in expected_distances.items():
+            for basis, distance in distances.items():
+                for d in [3, 5]:
+                    code = SurfaceCodeCircuit(d, d, basis=basis, schedule=schedule)
+                    qc = noisify_circuit(code.circuit["0"], noise_model)
+
+                    # detectors compare each syndrome measurement with the previous one
+                    stabilizers = getattr(code, basis + "_stabilizer_ops")
+                    detectors = []
+                    for t in range(d + 1):
+                        for p, stabilizer in enumerate(stabilizers):
+                            if t < d:
+                                clbits = [("round_" + str(t) + "_" + basis + "plaq_bit", p)]
+                            else:
+                                clbits = [("code_bit", q) for q in stabilizer]
+                            if t > 0:
+                                clbits.append(("round_" + str(t - 1) + "_" + basis + "plaq_bit", p))
+                            detectors.append(clbits)
+                    logicals = [[("code_bit", q) for q in getattr(code, basis + "_logical")[0]]]
+
+                    stim_circuit = get_stim_circuits(qc, detectors=detectors, logicals=logicals)
+                    self.assertEqual(
+                        len(stim_circuit[0][0].shortest_graphlike_error()),
+                        distance(d),
+                        "Wrong distance for schedule = "
+                        + schedule
+                        + ", basis = "
+                        + basis
+                        + " and d = "
+                        + str(d),
+                    )
+
+    def test_get(self):
+        """
+        Tests that cached code circuits are equal to new ones, and independent.
+        """
+        code = SurfaceCodeCircuit(3, 2, basis="x")
+        code0 = SurfaceCodeCircuit.get(3, 2, basis="x")
+        code1 = SurfaceCodeCircuit.get(3, 2, basis="x")
+        self.assertIsNot(code0, code1)
+        for log in ["0", "1"]:
+            self.assertEqual(code0.circuit[log], code.circuit[log])
+            self.assertEqual(code1.circuit[log], code.circuit[log])
+
+        code0.syndrome_measurement()
+        self.assertEqual(code0.T, 3)
+        self.assertEqual(code1.T, 2)
+        self.assertEqual(len(code1.zplaq_bits), 2)
+        for log in ["0", "1"]:
+            self.assertNotEqual(code0.circuit[log], code1.circuit[log])
+            self.assertEqual(code1.circuit[log], code.circuit[log])
+            self.assertEqual(
+                SurfaceCodeCircuit.get(3, 2, basis="x").circuit[log], code.circuit[log]
+            )
+
+        # lists in nodes and in the code object are also not shared with the cache
+        string = "100000001 0000 0000 0000 0001"
+        for node in code1.string2nodes(string, all_logicals=True):
+            node.qubits.append(9)
+        code1.x_stabilizer_ops[0].append(9)
+        code1.xplaqs[0][0] = 9
+        code2 = SurfaceCodeCircuit.get(3, 2, basis="x")
+        self.assertEqual(code2.string2nodes(string), code.string2nodes(string))
+        self.assertEqual(code2.x_stabilizer_ops, code.x_stabilizer_ops)
+        self.assertEqual(code2.xplaqs, code.xplaqs)
+
     def test_check_nodes(self):
         """
         Tests for correct interpretation of a set of nodes.